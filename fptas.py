@@ -1,4 +1,7 @@
 import gc
+import time
+
+from greedy import knapsack_2_approx_guloso
 
 def approximate_knapsack(valores, pesos, capacidade,epsilon=0.5):
     """
@@ -61,6 +64,204 @@ def approximate_knapsack(valores, pesos, capacidade,epsilon=0.5):
 
     return total_value, selected_items_indices
 
+def _limite_superior(valores, pesos, capacidade):
+    """
+    Limite superior de Dantzig (mochila fracionária) para o valor ótimo.
+    """
+    ordem = sorted(range(len(valores)),
+                   key=lambda i: valores[i] / pesos[i] if pesos[i] > 0 else float('inf'),
+                   reverse=True)
+    limite = 0
+    restante = capacidade
+    for i in ordem:
+        if pesos[i] <= restante:
+            limite += valores[i]
+            restante -= pesos[i]
+        else:
+            limite += valores[i] * restante / pesos[i]
+            break
+    return limite
+
+
+def _knapsack_escalado(valores, pesos, capacidade, mu, itens_base, limite_superior, prazo, max_celulas):
+    """
+    Programação dinâmica por valor escalado (floor(v / mu)), usada pelo modo anytime.
+
+    A tabela só cobre os valores escalados entre o limite inferior dado pela
+    solução anterior (itens_base, reescalada com o novo mu) e o limite superior.
+    Estados que não conseguem mais alcançar o limite inferior nem com todos os
+    itens restantes não são atualizados.
+
+    Returns:
+        tuple ou None: (valor, índices), ou None se o prazo ou o limite de
+                       memória (max_celulas) forem atingidos.
+    """
+    import numpy as np  # só o modo anytime usa numpy
+
+    n = len(valores)
+    escalados = np.floor(np.asarray(valores, dtype=float) / mu).astype(np.int64)
+    pesos_np = np.asarray(pesos, dtype=float)
+
+    topo = int(min(escalados.sum(), limite_superior // mu + 1))
+    if n * (topo + 1) > max_celulas:
+        return None
+
+    alvo = int(escalados[itens_base].sum()) if itens_base else 0
+    sufixo = np.zeros(n + 1, dtype=np.int64)
+    sufixo[:-1] = np.cumsum(escalados[::-1])[::-1]
+
+    dp = np.full(topo + 1, np.inf)
+    dp[0] = 0
+    # Para cada item: (primeiro valor coberto, bits dos valores melhorados pelo item)
+    linhas = []
+
+    for i in range(n):
+        if time.perf_counter() > prazo:
+            return None
+        s = int(escalados[i])
+        inicio = max(s, alvo - int(sufixo[i + 1]))
+        if s == 0 or inicio > topo:
+            linhas.append((inicio, None))
+            continue
+
+        candidato = dp[inicio - s: topo + 1 - s] + pesos_np[i]
+        atual = dp[inicio:]
+        melhora = (candidato < atual) & (candidato <= capacidade)
+        atual[melhora] = candidato[melhora]
+        linhas.append((inicio, np.packbits(melhora, bitorder='little')))
+
+    v = int(np.nonzero(dp <= capacidade)[0][-1])
+
+    selected_items_indices = []
+    for i in range(n - 1, -1, -1):
+        inicio, bits = linhas[i]
+        if bits is not None and v >= inicio and bits[(v - inicio) >> 3] >> ((v - inicio) & 7) & 1:
+            selected_items_indices.append(i)
+            v -= int(escalados[i])
+    selected_items_indices.reverse()
+
+    return sum(valores[i] for i in selected_items_indices), selected_items_indices
+
+
+def approximate_knapsack_anytime(valores, pesos, capacidade, tempo_limite,
+                                 epsilon_inicial=0.5, fator=0.5, epsilon_minimo=1e-3,
+                                 celulas_iniciais=2**20, max_celulas=2 * 10**9):
+    """
+    FPTAS anytime: em vez de um epsilon fixo, recebe um orçamento de tempo.
+
+    Começa pela solução gulosa (2-aproximação) e roda o FPTAS com escalas cada
+    vez mais finas (mu *= fator), usando a melhor solução até então como limite
+    inferior para podar a próxima escala. A primeira escala é escolhida para que
+    a tabela tenha no máximo celulas_iniciais células; as seguintes nunca passam
+    de max_celulas. Quando o tempo acaba, a escala em andamento é descartada e a
+    melhor solução é retornada.
+
+    Itens mais pesados que a capacidade nunca entram em uma solução e ficam fora
+    do v_max, do limite superior e da tabela. Itens de peso zero e valor positivo
+    sempre entram e também ficam fora da tabela.
+
+    Args:
+        valores (list): Lista de valores dos itens.
+        pesos (list): Lista de pesos dos itens.
+        capacidade (int): Capacidade máxima da mochila.
+        tempo_limite (float): Orçamento de tempo em segundos.
+        epsilon_inicial (float): Epsilon máximo da primeira escala.
+        fator (float): Fator de redução do mu entre escalas, entre 0 e 1.
+        epsilon_minimo (float): Para quando o epsilon fica menor que este valor.
+        celulas_iniciais (int): Tamanho máximo (itens x valores escalados) da primeira tabela.
+        max_celulas (int): Tamanho máximo (itens x valores escalados) da tabela de escolhas.
+    Returns: tuple
+        (int, list, float, float): valor total, lista de índices, epsilon da
+        melhor escala concluída e razão de aproximação provada
+        (valor >= razão * ótimo).
+    """
+    prazo = time.perf_counter() + tempo_limite
+    livres = [i for i in range(len(valores)) if pesos[i] == 0 and valores[i] > 0]
+    candidatos = [i for i in range(len(valores)) if 0 < pesos[i] <= capacidade and valores[i] > 0]
+    valor_livre = sum(valores[i] for i in livres)
+    if not candidatos:
+        return valor_livre, livres, 0.0, 1.0
+
+    valores = [valores[i] for i in candidatos]
+    pesos = [pesos[i] for i in candidatos]
+    n = len(valores)
+
+    limite_superior = _limite_superior(valores, pesos, capacidade)
+    v_max = max(valores)
+    inteiros = all(float(v).is_integer() for v in valores)
+
+    melhor_valor, itens_gulosos = knapsack_2_approx_guloso(valores, pesos, capacidade)
+    melhor_itens = sorted(item[2] for item in itens_gulosos)
+    melhor_epsilon = 0.5
+
+    # A tabela tem até n x (limite_superior / mu + 2) células
+    folga = max_celulas / n - 2
+    mu_minimo = limite_superior / folga if folga > 0 else float('inf')
+    mu = max(epsilon_inicial * v_max / n, n * limite_superior / celulas_iniciais)
+    mu_concluido = float('inf')
+
+    while melhor_valor < limite_superior:
+        mu = max(mu, mu_minimo)
+        # Com valores inteiros e mu <= 1 a escala 1 já é exata
+        exato = inteiros and mu <= 1
+        if exato:
+            mu = 1.0
+        epsilon = n * mu / v_max
+        if mu >= mu_concluido or (not exato and epsilon < epsilon_minimo):
+            # Não dá para refinar mais sem passar de max_celulas, ou já chegou ao epsilon mínimo
+            break
+
+        resultado = _knapsack_escalado(valores, pesos, capacidade, mu, melhor_itens,
+                                       limite_superior, prazo, max_celulas)
+        if resultado is None:
+            break
+
+        valor, itens = resultado
+        if valor > melhor_valor:
+            melhor_valor, melhor_itens = valor, itens
+        melhor_epsilon = 0.0 if exato else min(epsilon, melhor_epsilon)
+        mu_concluido = mu
+        if exato:
+            break
+        mu *= fator
+
+    # valor_livre entra na solução e no ótimo, então só melhora a razão
+    razao = max(1 - melhor_epsilon, (valor_livre + melhor_valor) / (valor_livre + limite_superior))
+    indices = sorted(livres + [candidatos[i] for i in melhor_itens])
+    return valor_livre + melhor_valor, indices, melhor_epsilon, min(razao, 1.0)
+
+
+def _forca_bruta(valores, pesos, capacidade):
+    """
+    Ótimo por enumeração de todos os subconjuntos, só para instâncias pequenas.
+    """
+    melhor = 0
+    for mascara in range(1 << len(valores)):
+        itens = [i for i in range(len(valores)) if mascara >> i & 1]
+        if sum(pesos[i] for i in itens) <= capacidade:
+            melhor = max(melhor, sum(valores[i] for i in itens))
+    return melhor
+
+
+def _verificar_anytime(instancias=300, semente=0):
+    """
+    Compara o modo anytime com a força bruta em instâncias pequenas aleatórias,
+    incluindo itens que não cabem na mochila e itens de peso zero.
+    """
+    import random
+    rng = random.Random(semente)
+    for _ in range(instancias):
+        n = rng.randint(1, 10)
+        valores = [rng.choice([rng.randint(0, 50), rng.randint(1, 10**6)]) for _ in range(n)]
+        pesos = [rng.choice([rng.randint(0, 30), rng.randint(1, 10**4)]) for _ in range(n)]
+        capacidade = rng.randint(0, 80)
+        otimo = _forca_bruta(valores, pesos, capacidade)
+        valor, itens, epsilon, razao = approximate_knapsack_anytime(valores, pesos, capacidade, 1.0)
+        assert sum(pesos[i] for i in itens) <= capacidade, (valores, pesos, capacidade)
+        assert valor == sum(valores[i] for i in itens) <= otimo, (valores, pesos, capacidade)
+        assert valor >= razao * otimo - 1e-9, (valores, pesos, capacidade, valor, otimo, razao)
+    return instancias
+
 # Exemplo de uso:
 if __name__ == '__main__':
     valores = [70, 20, 39, 37, 7, 5, 10]
@@ -77,4 +278,10 @@ if __name__ == '__main__':
     print(f"Índices dos itens selecionados: {approx_items}")
     
     selected_pesos = sum(pesos[i] for i in approx_items)
-    print(f"Peso total dos itens selecionados: {selected_pesos}")
\ No newline at end of file
+    print(f"Peso total dos itens selecionados: {selected_pesos}")
+
+    valor_anytime, itens_anytime, epsilon_final, razao = approximate_knapsack_anytime(valores, pesos, capacidade, tempo_limite=1.0)
+    print(f"Modo anytime (1 s): valor = {valor_anytime}, epsilon = {epsilon_final}, razão provada = {razao:.4f}")
+    print(f"Índices dos itens selecionados: {itens_anytime}")
+
+    print(f"Modo anytime conferido com a força bruta em {_verificar_anytime()} instâncias pequenas")
@@ -44,6 +44,25 @@ def knapsack_2_approx_guloso(valor, peso, capacidade):
     else:
         return valor_max, [(valor[item_max_valor], peso[item_max_valor], item_max_valor)]
 
+def knapsack_guloso_indices(valor, peso, capacidade):
+    """
+    Versão de knapsack_2_approx_guloso que aceita qualquer entrada: itens de peso
+    zero (e valor positivo) sempre entram e itens que não cabem sozinhos são
+    ignorados, em vez de dividir por zero ou não achar o item de maior valor.
+
+    Returns:
+        Uma tupla contendo o valor total e a lista ordenada dos índices escolhidos.
+    """
+    livres = [i for i in range(len(valor)) if peso[i] == 0 and valor[i] > 0 and capacidade >= 0]
+    candidatos = [i for i in range(len(valor)) if 0 < peso[i] <= capacidade]
+    valor_livre = sum(valor[i] for i in livres)
+    if not candidatos:
+        return valor_livre, livres
+
+    valor_guloso, itens = knapsack_2_approx_guloso([valor[i] for i in candidatos],
+                                                   [peso[i] for i in candidatos], capacidade)
+    return valor_livre + valor_guloso, sorted(livres + [candidatos[item[2]] for item in itens])
+
 def __main__():
     # --- Exemplo de Uso 1: ---
 
@@ -1,36 +1,41 @@
 # system imports
 import os
-import psutil
-import subprocess
-from datetime import datetime, timedelta
-import argparse
-import time
+from datetime import datetime
 
-import pandas as pd
+# Logging imports
+import logging
 
 # Local Utility imports
 import modules.utils as ut
 from modules.logger import setup_logger
+from modules.results_writer import ResultsWriter
+
+# Local File Handling imports
+import modules.read_file as file_module
+import modules.branch_and_bound as bb_module
 
 
 # Constants
 CURRENT_TIME = datetime.now().strftime("%Y%m%d_%H%M%S")
 
+# Set by setup(): importing this module reads no config and creates no log file
+config = None
+logger = logging.getLogger(__name__)
 
-config = ut.load_config()
 
-LOG_PATH = config["log_dir"] + f"branch_and_bound_{CURRENT_TIME}.log"
-logger = setup_logger(LOG_PATH)
+def setup(config_path: str = "config.json"):
+    """
+    Loads the configuration and sets up the log file shared by the modules.
+    """
+    global config, logger
+    config = ut.load_config(config_path)
 
+    LOG_PATH = config["log_dir"] + f"branch_and_bound_{CURRENT_TIME}.log"
+    logger = setup_logger(LOG_PATH)
+    logger.info(f"Log file created at: {LOG_PATH}")
 
-logger.info(f"Log file created at: {LOG_PATH}")
-
-# Local File Handling imports
-import modules.read_file as file_module
-file_module.logger = logger
-
-import modules.branch_and_bound as bb_module
-bb_module.logger = logger
+    file_module.logger = logger
+    bb_module.logger = logger
 
 def main():
     
@@ -40,31 +45,57 @@ def main():
             optimum_dir=config["optimal_dataset_dir"]
         )
     
-    optimum = {}
-    for file_name in file_names:
-        logger.info(f"Processing file: {file_name}")
-        file_path = os.path.join(config["dataset_dir"], file_name)
-        
-        
-        # Solve the knapsack problem using branch and bound
-        optimal_profit, selected_items, time_taken = bb_module.run_knapsack(file_path)
-        logger.info(f"Optimal profit for {file_name}: {optimal_profit} in {time_taken:.4f} seconds")
-        logger.debug(f"Selected items: {selected_items}")
-        # Store the optimal profit and selected items
-        optimum[file_name] = {
-            "optimal_profit": optimal_profit,
-            "selected_items": selected_items,
-            "time_taken": time_taken
-        }
+    # Results are appended and flushed per instance, so an interrupted sweep
+    # can be resumed: instances already in the results file are skipped.
+    output_file = os.path.join(config["branch_and_bound_results_dir"], f"branch_and_bound_results_{os.path.basename(config['dataset_dir'])}.csv")
+    with ResultsWriter(output_file,
+                       columns=["optimal_profit", "selection_offset", "time_taken", "gap"],
+                       delimiter=config["file_delimiter"]) as writer:
+        for file_name in file_names:
+            if writer.is_done(file_name):
+                logger.info(f"Skipping file already in results: {file_name}")
+                continue
+            logger.info(f"Processing file: {file_name}")
+            file_path = os.path.join(config["dataset_dir"], file_name)
+            # Searches interrupted before writing their results (e.g. a crash) continue from
+            # their checkpoint, but only when this run continues the same results file: a
+            # checkpoint left by an older sweep is ignored and overwritten.
+            checkpoint_path = None
+            if config.get("checkpoint_dir"):
+                checkpoint_path = os.path.join(config["checkpoint_dir"], f"{file_name}.ckpt")
+                if not writer.resumed and os.path.exists(checkpoint_path):
+                    logger.warning(f"Ignoring checkpoint from a previous sweep: {checkpoint_path}")
+            
+            
+            # Solve the knapsack problem using branch and bound
+            optimal_profit, selected_items, time_taken, gap = bb_module.run_knapsack(
+                file_path, return_indices=True,
+                gap_rel=config.get("gap_rel", 0.0), gap_abs=config.get("gap_abs", 0.0),
+                heuristics=config.get("heuristics"), heuristic_time=config.get("heuristic_time", 1.0),
+                checkpoint_path=checkpoint_path, checkpoint_interval=config.get("checkpoint_interval", 60.0),
+                resume=writer.resumed)
+            logger.info(f"Optimal profit for {file_name}: {optimal_profit} in {time_taken:.4f} seconds (gap {gap:.6%})")
+            logger.debug(f"Selected items: {selected_items}")
+            # Store the optimal profit and selected items
+            writer.write(file_name, {
+                "optimal_profit": optimal_profit,
+                "time_taken": time_taken,
+                "gap": gap
+            }, selection=selected_items)
+            # The row is final: the next run skips this instance, so its checkpoint
+            # (left when the time limit or the gap stopped the search) is not resumed
+            # either. With keep_checkpoints it is kept, and the search can be continued
+            # by hand with a new budget:
+            #   bb_module.run_knapsack(file_path, checkpoint_path=checkpoint_path, resume=True)
+            if checkpoint_path and os.path.exists(checkpoint_path) and not config.get("keep_checkpoints", False):
+                os.remove(checkpoint_path)
     
-    # Save the results to a file
-    output_file = os.path.join(config["branch_and_bound_results_dir"], f"branch_and_bound_results_{os.path.basename(config["dataset_dir"])}.csv")
-    pd.DataFrame.from_dict(optimum, orient='index').to_csv(output_file, sep=config["file_delimiter"])
     logger.info(f"Results saved to {output_file}")
     logger.info(f"main function ended successfully, returning 0")
     return 0
         
 if __name__ == "__main__":
+    setup()
     logger.info("Starting the branch and bound algorithm...")
     start_time = datetime.now()
     success = True
@@ -1,5 +1,6 @@
 import os
 import time
+from modules.results_writer import ResultsWriter
 from greedy import knapsack_2_approx_guloso
 
 def ler_instancia(caminho_arquivo, caminho_otimo, ignorar_ultima_linha=False):
@@ -26,8 +27,13 @@ if __name__ == "__main__":
         log_dir = os.path.join("results", "greedy")
         os.makedirs(log_dir, exist_ok=True)
         log_path = os.path.join(log_dir, f"greedy_results_{subdir}.csv")
-        resultados = []
+        # Cada resultado é gravado assim que a instância termina;
+        # instâncias já presentes no arquivo são puladas ao retomar
+        writer = ResultsWriter(log_path, columns=["optimal_profit", "greedy_profit", "selection_offset", "time_taken"])
         for nome_arquivo in os.listdir(pasta):
+            if writer.is_done(nome_arquivo):
+                print(f"Arquivo '{nome_arquivo}' já processado, pulando")
+                continue
             caminho_arquivo = os.path.join(pasta, nome_arquivo)
             caminho_otimo = os.path.join(base_dir, subdir + "-optimum", nome_arquivo)
             if os.path.isfile(caminho_arquivo):
@@ -42,10 +48,9 @@ if __name__ == "__main__":
                     fim = time.time()
                     tempo = fim - inicio
                     itens_indices = [i[2] for i in itens_greedy]
-                    resultados.append(f"{nome_arquivo};{otimo};{valor_greedy};{itens_indices};{tempo}\n")
+                    writer.write(nome_arquivo, {"optimal_profit": otimo, "greedy_profit": valor_greedy, "time_taken": tempo},
+                                 selection=itens_indices, n_items=n)
                     print(f"Arquivo '{nome_arquivo}' processado: Valor ótimo = {otimo}, Valor greedy = {valor_greedy}, Tempo = {tempo:.6f} segundos")
                 except Exception as e:
                     print(f"Erro ao processar '{nome_arquivo}': {e}")
-        with open(log_path, "w", encoding="utf-8") as log_file:
-            log_file.write(";optimal_profit;greedy_profit;selected_items;time_taken\n")
-            log_file.writelines(resultados)
\ No newline at end of file
+        writer.close()
@@ -0,0 +1,68 @@
+# System imports
+import time
+
+# Local imports
+import modules.branch_and_bound as bb_module
+import fptas as fptas_module
+import greedy as greedy_module
+
+# Logging imports
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Programmatic entry point for the solvers. Importing this module only loads
+# the standard library and numpy: it does not read config.json, set up log
+# files or import the report dependencies used by the runner scripts.
+ALGORITHMS = ("bnb", "fptas", "fptas_anytime", "greedy")
+
+
+def solve(items, capacity, algorithm="bnb", time_limit_seconds=None, **params):
+    """
+    Solves a knapsack instance with one of the solvers.
+
+    Args:
+        items (list): (profit, weight) pairs.
+        capacity (float): The maximum capacity of the knapsack.
+        algorithm (str): Optional. One of ALGORITHMS.
+        time_limit_seconds (float): Optional. Time limit for the solvers that take one
+                                    (bnb and fptas_anytime).
+        **params: Optional. Keyword arguments for the solver, e.g. gap_rel for bnb or
+                  epsilon for fptas.
+
+    Returns:
+        dict: profit, selected (indices of the selected items), solve_time and, depending
+              on the algorithm, gap (bnb) or epsilon and ratio (fptas_anytime).
+    """
+    values = [p for p, _ in items]
+    weights = [w for _, w in items]
+    result = {}
+
+    start = time.perf_counter()
+    if algorithm == "bnb":
+        if time_limit_seconds is not None:
+            params["time_limit_seconds"] = time_limit_seconds
+        params.setdefault("show_progress", False)
+        profit, selected, _, gap = bb_module.solve_knapsack_bnb(
+            [(p, w) for p, w in items], capacity, return_indices=True, **params)
+        result["gap"] = gap
+    elif algorithm == "fptas":
+        profit, selected = fptas_module.approximate_knapsack(values, weights, capacity, **params)
+    elif algorithm == "fptas_anytime":
+        tempo_limite = params.pop("tempo_limite", 1.0)
+        if time_limit_seconds is not None:
+            tempo_limite = time_limit_seconds
+        profit, selected, epsilon, ratio = fptas_module.approximate_knapsack_anytime(
+            values, weights, capacity, tempo_limite, **params)
+        result["epsilon"] = epsilon
+        result["ratio"] = ratio
+    elif algorithm == "greedy":
+        profit, selected = greedy_module.knapsack_guloso_indices(values, weights, capacity)
+    else:
+        raise ValueError(f"Unknown algorithm '{algorithm}'. Available: {ALGORITHMS}")
+
+    result["solve_time"] = time.perf_counter() - start
+    result["profit"] = profit
+    result["selected"] = [int(i) for i in selected]
+    return result
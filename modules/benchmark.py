@@ -0,0 +1,73 @@
+# System imports
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+
+# Entry points measured by the cold-start benchmark
+STARTUP_TARGETS = ("modules.api", "modules.branch_and_bound", "fptas", "greedy", "main", "modules.service")
+
+# Small solve run after the import, to measure the time to a first answer
+FIRST_SOLVE = "solve([(60, 10), (100, 20), (120, 30)], 50)"
+
+_SCRIPT = """
+import time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+{solve}
+print(imported - start, time.perf_counter() - imported)
+"""
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_cold_start(module, repeats=5, first_solve=False):
+    """
+    Measures the start-up cost of an entry point in fresh interpreters.
+
+    Args:
+        module (str): Module to import.
+        repeats (int): Optional. Number of fresh interpreters to start.
+        first_solve (bool): Optional. Also run a small modules.api solve after the import.
+
+    Returns:
+        dict: Median times in seconds: total (interpreter start to exit), import and solve.
+    """
+    solve = f"from modules.api import solve; {FIRST_SOLVE}" if first_solve else ""
+    script = _SCRIPT.format(module=module, solve=solve)
+    totals, imports, solves = [], [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", script], cwd=ROOT_DIR, check=True,
+                                capture_output=True, text=True).stdout
+        totals.append(time.perf_counter() - start)
+        import_time, solve_time = map(float, output.split()[-2:])
+        imports.append(import_time)
+        solves.append(solve_time)
+    return {
+        "total": statistics.median(totals),
+        "import": statistics.median(imports),
+        "solve": statistics.median(solves),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark of the solver entry points.")
+    parser.add_argument("modules", nargs="*", default=STARTUP_TARGETS, help="Modules to import.")
+    parser.add_argument("-r", "--repeats", type=int, default=5, help="Fresh interpreters per module.")
+    parser.add_argument("--first-solve", action="store_true",
+                        help=f"Also time `{FIRST_SOLVE}` after the import, including loading modules.api if needed.")
+    args = parser.parse_args()
+
+    print(f"{'module':<28}{'total (ms)':>12}{'import (ms)':>13}{'solve (ms)':>12}")
+    for module in args.modules:
+        result = measure_cold_start(module, args.repeats, args.first_solve)
+        print(f"{module:<28}{result['total'] * 1000:>12.1f}{result['import'] * 1000:>13.1f}{result['solve'] * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
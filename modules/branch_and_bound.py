@@ -1,17 +1,22 @@
-import pandas as pd
+import os
 import time
-import sys
-
-from tqdm import tqdm
+import math
+from contextlib import nullcontext
 
 import logging
 
 
+# Replaced by the runner scripts with their configured logger
+logger = logging.getLogger(__name__)
+
 # Global variables to store the best solution found so far
 # Using globals for simplicity in this recursive example, but for larger applications
 # consider passing these through function arguments or using a class.
 max_profit = 0
 optimal_items_selection = [] # Stores boolean indicating if item at original index is taken
+best_bound = float('inf') # Upper bound on the optimal profit proven by the search
+nodes_explored = 0 # Nodes explored by the search, across resumed runs
+pbar = None # tqdm progress bar, only while solve_knapsack_bnb runs with show_progress
 
 def calculate_bound(level, current_profit, current_weight, capacity, items):
     """
@@ -48,7 +53,53 @@ def calculate_bound(level, current_profit, current_weight, capacity, items):
     return bound_profit
 
 
-def _knapsack_bnb_iterative(capacity, items, time_limit_seconds):
+def global_upper_bound(stack, integral=False):
+    """
+    Upper bound on the optimal profit given the open nodes of the search.
+
+    Every node on the stack carries its own fractional bound, computed when it is
+    pushed (nodes loaded from older checkpoints may carry their parent's bound, which
+    is also valid since a child's bound never exceeds its parent's). Nodes already popped
+    are either pruned or expanded, so the optimum is either the incumbent or lies
+    below one of the open nodes.
+
+    Args:
+        stack (list): The open nodes, (level, profit, weight, selection, bound) tuples.
+        integral (bool): If True, profits are integers and the bound is rounded down.
+
+    Returns:
+        float: The upper bound, at least max_profit.
+    """
+    bound = max_profit
+    for node in stack:
+        if node[4] > bound:
+            bound = node[4]
+    if integral:
+        bound = math.floor(bound + 1e-9)
+    return max(bound, max_profit)
+
+
+def _gap_reached(bound, gap_rel, gap_abs):
+    """
+    Checks whether the incumbent is within the requested absolute or relative gap of bound.
+    """
+    gap = bound - max_profit
+    return gap <= gap_abs or (bound > 0 and gap / bound <= gap_rel)
+
+
+def _write_checkpoint(checkpoint_path, capacity, items, stack, elapsed):
+    """
+    Saves the current search state, see modules.checkpoint.save_checkpoint.
+    """
+    if checkpoint_path:
+        from modules.checkpoint import save_checkpoint
+        save_checkpoint(checkpoint_path, items, capacity, stack, max_profit,
+                        optimal_items_selection, nodes_explored, elapsed)
+
+
+def _knapsack_bnb_iterative(capacity, items, time_limit_seconds, root_bound=float('inf'),
+                            integral=False, gap_rel=0.0, gap_abs=0.0, stack=None,
+                            checkpoint_path=None, checkpoint_interval=60.0, elapsed_before=0.0):
     """
     Iterative function for the Branch and Bound algorithm using an explicit stack (DFS).
 
@@ -57,23 +108,36 @@ def _knapsack_bnb_iterative(capacity, items, time_limit_seconds):
         items (list): A list of tuples (profit, weight, original_index) for all items,
                       sorted by profit/weight ratio in descending order.
         time_limit_seconds (float): The maximum time allowed for execution in seconds.
+        root_bound (float): Optional. Upper bound of the root node.
+        integral (bool): Optional. If True, profits are integers and bounds are rounded down.
+        gap_rel (float): Optional. Stop once (bound - max_profit) / bound <= gap_rel.
+        gap_abs (float): Optional. Stop once bound - max_profit <= gap_abs.
+        stack (list): Optional. Open nodes to continue from, e.g. loaded from a checkpoint.
+        checkpoint_path (str): Optional. If given, the search state is saved to this file every
+                               checkpoint_interval seconds and when the search stops early.
+        checkpoint_interval (float): Optional. Seconds between checkpoints.
+        elapsed_before (float): Optional. Search time of previous runs, stored in the checkpoint.
+
+    Returns:
+        float: The proven upper bound on the optimal profit (max_profit if the search finished).
     """
-    global max_profit, optimal_items_selection, pbar
+    global max_profit, optimal_items_selection, nodes_explored, pbar
 
-    # Stack will store tuples: (level, current_profit, current_weight, current_selection_copy)
-    # We push the "exclude" branch first, so "include" branch is processed first (DFS behavior)
-    stack = []
-    
-    # Initial state for the "exclude" branch of the first item
-    initial_selection = [False] * len(items)
-    # The initial node to push onto the stack represents starting before the first item
-    # We push the "exclude" branch first so that the "include" branch for the current level
-    # is explored first when we pop from the stack (LIFO behavior of stack).
-    # This means the first branch considered will be to *include* the first item.
-    stack.append((0, 0, 0, initial_selection)) 
+    if stack is None:
+        # Stack will store tuples: (level, current_profit, current_weight, current_selection_copy, bound)
+        # We push the "exclude" branch first, so "include" branch is processed first (DFS behavior)
+        stack = []
+
+        # Initial state for the "exclude" branch of the first item
+        initial_selection = [False] * len(items)
+        # The initial node to push onto the stack represents starting before the first item
+        # We push the "exclude" branch first so that the "include" branch for the current level
+        # is explored first when we pop from the stack (LIFO behavior of stack).
+        # This means the first branch considered will be to *include* the first item.
+        stack.append((0, 0, 0, initial_selection, root_bound))
 
     start_time = time.time()
-    nodes_explored = 0 # For potential alternative progress tracking
+    last_checkpoint = start_time
 
     logger.debug(f"Starting iterative B&B. Initial max_profit: {max_profit}")
 
@@ -88,9 +152,18 @@ def _knapsack_bnb_iterative(capacity, items, time_limit_seconds):
                 # Ensure the progress bar is closed if it's active
                 if pbar:
                     pbar.close()
-                return # Exit the function, current max_profit is the best found so far
-
-        level, current_profit, current_weight, current_selection = stack.pop()
+                _write_checkpoint(checkpoint_path, capacity, items, stack, elapsed_before + elapsed_time)
+                return global_upper_bound(stack, integral) # Current max_profit is the best found so far
+            bound = global_upper_bound(stack, integral)
+            if _gap_reached(bound, gap_rel, gap_abs):
+                logger.info(f"Gap tolerance reached after {elapsed_time:.2f}s: max_profit {max_profit:.2f}, bound {bound:.2f}. Terminating Branch and Bound search.")
+                _write_checkpoint(checkpoint_path, capacity, items, stack, elapsed_before + elapsed_time)
+                return bound
+            if checkpoint_path and time.time() - last_checkpoint >= checkpoint_interval:
+                _write_checkpoint(checkpoint_path, capacity, items, stack, elapsed_before + elapsed_time)
+                last_checkpoint = time.time()
+
+        level, current_profit, current_weight, current_selection, upper_bound = stack.pop()
 
         # Update tqdm progress bar (based on level)
         # Only update if the current level is higher than what tqdm has recorded
@@ -109,10 +182,15 @@ def _knapsack_bnb_iterative(capacity, items, time_limit_seconds):
                 # logger.debug(f"Found new best solution at level {level}: Profit {current_profit:.2f}, Weight {current_weight:.2f}")
                 max_profit = current_profit
                 optimal_items_selection = list(current_selection) # Store a copy
+                if gap_rel > 0 or gap_abs > 0:
+                    bound = global_upper_bound(stack, integral)
+                    if _gap_reached(bound, gap_rel, gap_abs):
+                        logger.info(f"Gap tolerance reached: max_profit {max_profit:.2f}, bound {bound:.2f}. Terminating Branch and Bound search.")
+                        _write_checkpoint(checkpoint_path, capacity, items, stack, elapsed_before + time.time() - start_time)
+                        return bound
             continue # Go to the next node in the stack
 
-        # Pruning 2: Calculate upper bound for the current node
-        upper_bound = calculate_bound(level, current_profit, current_weight, capacity, items)
+        # Pruning 2: The node's upper bound was computed when it was pushed
         if upper_bound <= max_profit:
             # logger.debug(f"Pruning at level {level}: bound {upper_bound:.2f} <= max_profit {max_profit:.2f}")
             continue # Go to the next node in the stack
@@ -122,27 +200,40 @@ def _knapsack_bnb_iterative(capacity, items, time_limit_seconds):
 
         # Branch 2: Exclude the current item
         # Push the "exclude" branch first, so "include" branch is processed later (DFS)
-        # Create a copy of the selection for this branch
-        next_selection_exclude = list(current_selection)
-        next_selection_exclude[original_index] = False # Ensure it's not taken
-        stack.append((level + 1, current_profit, current_weight, next_selection_exclude))
+        # Its own bound is pushed with it: exclude nodes stay on the stack the longest,
+        # so the bound of the whole search (global_upper_bound) depends on them
+        exclude_bound = calculate_bound(level + 1, current_profit, current_weight, capacity, items)
+        if integral:
+            exclude_bound = math.floor(exclude_bound + 1e-9)
+        if exclude_bound > max_profit:
+            # Create a copy of the selection for this branch
+            next_selection_exclude = list(current_selection)
+            next_selection_exclude[original_index] = False # Ensure it's not taken
+            stack.append((level + 1, current_profit, current_weight, next_selection_exclude, exclude_bound))
         # logger.debug(f"Pushed exclude branch for item {level+1}. Stack size: {len(stack)}")
 
 
         # Branch 1: Include the current item
-        # Only push if it's potentially valid (weight constraint)
+        # Only push if it's potentially valid (weight constraint). The item fits, so the
+        # fractional bound takes it whole as well and the node keeps this node's bound.
         if current_weight + item_weight <= capacity:
             # Create a copy of the selection for this branch
             next_selection_include = list(current_selection)
             next_selection_include[original_index] = True
-            stack.append((level + 1, current_profit + item_profit, current_weight + item_weight, next_selection_include))
+            stack.append((level + 1, current_profit + item_profit, current_weight + item_weight, next_selection_include, upper_bound))
             # logger.debug(f"Pushed include branch for item {level+1}. Stack size: {len(stack)}")
         # else:
             # logger.debug(f"Skipped include branch for item {level+1}: weight {current_weight + item_weight:.2f} > capacity {capacity:.2f}")
 
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path) # Nothing left to resume
+    return max_profit # The stack is empty: max_profit is optimal
 
 
-def solve_knapsack_bnb(items_data, capacity, time_limit_seconds=10*60): # Default 30 minutes
+def solve_knapsack_bnb(items_data, capacity, time_limit_seconds=10*60, return_indices=False,
+                       gap_rel=0.0, gap_abs=0.0, heuristics=None, heuristic_time=1.0,
+                       checkpoint_path=None, checkpoint_interval=60.0, resume=False,
+                       show_progress=True): # Default 30 minutes
     """
     Main function to solve the knapsack problem using Branch and Bound.
 
@@ -150,16 +241,39 @@ def solve_knapsack_bnb(items_data, capacity, time_limit_seconds=10*60): # Defaul
         items_data (list): A list of tuples, where each tuple is (profit, weight).
         capacity (float): The maximum capacity of the knapsack.
         time_limit_seconds (float): Optional. The maximum time allowed for execution in seconds.
+        return_indices (bool): Optional. If True, return the indices of the selected items
+                               instead of their (profit, weight) tuples.
+        gap_rel (float): Optional. Relative gap tolerance, stop once (bound - profit) / bound <= gap_rel.
+        gap_abs (float): Optional. Absolute gap tolerance, stop once bound - profit <= gap_abs.
+        heuristics (tuple): Optional. Heuristics run before the search to seed the incumbent,
+                            any of modules.heuristics.HEURISTICS. By default only the density
+                            greedy is used.
+        heuristic_time (float): Optional. Time slice in seconds for the heuristics stage,
+                                taken from time_limit_seconds.
+        checkpoint_path (str): Optional. File where the open nodes, incumbent and counters are
+                               saved periodically and when the time limit or the gap stops the
+                               search. It is removed once the search completes.
+        checkpoint_interval (float): Optional. Seconds between periodic checkpoints.
+        resume (bool): Optional. Continue from checkpoint_path, if it exists, with a new
+                       time_limit_seconds budget. The heuristics stage is skipped. A
+                       checkpoint of another instance, or an unreadable one, is ignored
+                       with a warning and the search starts from scratch. The gap tolerances
+                       are the ones given now. A search stopped by the time limit or the gap
+                       keeps its checkpoint, so it can be continued this way by hand.
+        show_progress (bool): Optional. Show the tqdm progress bar.
 
     Returns:
-        tuple: (optimal_profit, selected_items_list, time_taken)
+        tuple: (optimal_profit, selected_items_list, time_taken, gap)
                optimal_profit (float): The maximum profit achievable.
-               selected_items_list (list): A list of (profit, weight) tuples for the selected items.
+               selected_items_list (list): A list of (profit, weight) tuples for the selected items,
+                                           or their indices in items_data if return_indices is True.
                time_taken (float): The time taken to execute the algorithm in seconds.
+               gap (float): Proven relative gap (bound - profit) / bound, 0.0 if the profit is optimal.
     """
-    global max_profit, optimal_items_selection, pbar
+    global max_profit, optimal_items_selection, best_bound, nodes_explored, pbar
     max_profit = 0
     optimal_items_selection = [False] * len(items_data)
+    nodes_explored = 0
 
     indexed_items = []
     for i, (p, w) in enumerate(items_data):
@@ -171,23 +285,72 @@ def solve_knapsack_bnb(items_data, capacity, time_limit_seconds=10*60): # Defaul
     sorted_items = sorted(indexed_items, key=lambda x: x[0], reverse=True)
     processed_items = [(item[1], item[2], item[3]) for item in sorted_items]
 
-    # --- Optimization: Initialize max_profit with a greedy heuristic ---
-    greedy_current_weight = 0
-    greedy_current_profit = 0
-    for item_ratio, item_profit, item_weight, original_idx in sorted_items:
-        if greedy_current_weight + item_weight <= capacity:
-            greedy_current_weight += item_weight
-            greedy_current_profit += item_profit
-    max_profit = greedy_current_profit
+    start_time = time.time()
+
+    stack = None
+    elapsed_before = 0.0
+    heuristic_bound = float('inf')
+    state = None
+    if resume and checkpoint_path and os.path.exists(checkpoint_path):
+        from modules.checkpoint import load_checkpoint
+        try:
+            state = load_checkpoint(checkpoint_path, processed_items, capacity)
+        except ValueError as e:
+            # e.g. a checkpoint of a regenerated instance with the same name; it is
+            # overwritten by the new search
+            logger.warning(f"{e} Starting the search from scratch.")
+    if state is not None:
+        stack = state["stack"]
+        max_profit = state["max_profit"]
+        optimal_items_selection = state["selection"]
+        nodes_explored = state["nodes_explored"]
+        elapsed_before = state["elapsed"]
+    # --- Optimization: Initialize max_profit with a heuristic incumbent ---
+    elif heuristics:
+        # The heuristics need numpy, only loaded when they are used
+        from modules.heuristics import initial_solution
+        max_profit, incumbent, heuristic_bound = initial_solution(items_data, capacity, heuristics, heuristic_time)
+        # The bound is only used to skip or stop the search early, it must never drop below the incumbent
+        heuristic_bound = max(heuristic_bound, max_profit)
+        for original_idx in incumbent:
+            optimal_items_selection[original_idx] = True
+        logger.info(f"Heuristic incumbent ({', '.join(heuristics)}): {max_profit:.2f} in {time.time() - start_time:.4f} seconds")
+    else:
+        greedy_current_weight = 0
+        greedy_current_profit = 0
+        for item_ratio, item_profit, item_weight, original_idx in sorted_items:
+            if greedy_current_weight + item_weight <= capacity:
+                greedy_current_weight += item_weight
+                greedy_current_profit += item_profit
+                optimal_items_selection[original_idx] = True
+        max_profit = greedy_current_profit
     # ------------------------------------------------------------------
 
-    start_time = time.time()
+    integral = all(float(p).is_integer() for p, _ in items_data)
+    root_bound = min(calculate_bound(0, 0, 0, capacity, processed_items), heuristic_bound)
+    if integral:
+        root_bound = math.floor(root_bound + 1e-9)
+    remaining_time = time_limit_seconds - (time.time() - start_time)
 
-    # --- TQDM Initialization ---
-    with tqdm(total=len(items_data), desc="Processing Items (Iterative B&B)", unit="item") as bar:
-        pbar = bar
-        _knapsack_bnb_iterative(capacity, processed_items, time_limit_seconds)
-    pbar = None
+    if stack is None and (root_bound <= max_profit or _gap_reached(root_bound, gap_rel, gap_abs)):
+        # The incumbent is already proven optimal (or within the gap), no search needed
+        logger.info(f"Incumbent {max_profit:.2f} already within the gap of the bound {root_bound:.2f}, skipping the search.")
+        best_bound = max(root_bound, max_profit)
+    else:
+        # --- TQDM Initialization ---
+        # tqdm is only imported when the progress bar is shown, to keep imports light
+        if show_progress:
+            from tqdm import tqdm
+            progress = tqdm(total=len(items_data), desc="Processing Items (Iterative B&B)", unit="item")
+        else:
+            progress = nullcontext()
+        with progress as bar:
+            pbar = bar
+            best_bound = min(_knapsack_bnb_iterative(capacity, processed_items, remaining_time,
+                                                     root_bound, integral, gap_rel, gap_abs, stack,
+                                                     checkpoint_path, checkpoint_interval, elapsed_before),
+                             root_bound)
+        pbar = None
 
     end_time = time.time()
     time_taken = end_time - start_time
@@ -196,10 +359,12 @@ def solve_knapsack_bnb(items_data, capacity, time_limit_seconds=10*60): # Defaul
     final_selected_items = []
     for i, taken in enumerate(optimal_items_selection):
         if taken:
-            final_selected_items.append(items_data[i])
+            final_selected_items.append(i if return_indices else items_data[i])
 
+    gap = (best_bound - max_profit) / best_bound if best_bound > 0 else 0.0
     logger.info(f"Max Profit: {max_profit:.2f} with {len(final_selected_items)} items selected.")
-    return max_profit, final_selected_items, time_taken
+    logger.info(f"Upper bound: {best_bound:.2f}, gap: {gap:.6%}")
+    return max_profit, final_selected_items, time_taken, gap
 
 def read_items_from_csv(filepath):
     """
@@ -282,16 +447,25 @@ def read_items_from_csv(filepath):
         return [], 0.0
 
 
-def run_knapsack(csv_file):
+def run_knapsack(csv_file, return_indices=False, gap_rel=0.0, gap_abs=0.0, heuristics=None, heuristic_time=1.0,
+                 checkpoint_path=None, checkpoint_interval=60.0, resume=False):
     """
     Example function to run the knapsack solver with a given CSV file.
     This is for demonstration purposes and can be modified as needed.
     
     Args:
         csv_file (str): Path to the CSV file containing items and knapsack capacity.
+        return_indices (bool): Optional. Return the indices of the selected items.
+        gap_rel (float): Optional. Relative gap tolerance for early termination.
+        gap_abs (float): Optional. Absolute gap tolerance for early termination.
+        heuristics (tuple): Optional. Heuristics used to seed the incumbent.
+        heuristic_time (float): Optional. Time slice for the heuristics stage in seconds.
+        checkpoint_path (str): Optional. File where the search state is checkpointed.
+        checkpoint_interval (float): Optional. Seconds between checkpoints.
+        resume (bool): Optional. Continue from checkpoint_path if it exists.
         
     Returns:
-        tuple: (optimal_profit, selected_items, time_taken)
+        tuple: (optimal_profit, selected_items, time_taken, gap)
     """
     items, capacity = read_items_from_csv(csv_file)
     if not items:
@@ -300,7 +474,12 @@ def run_knapsack(csv_file):
 
     logger.info(f"Knapsack Capacity: {capacity}")
     logger.info(f"{len(items)} items loaded from CSV: {csv_file}")
-    optimal_profit, selected_items, time_taken = solve_knapsack_bnb(items, capacity)
+    optimal_profit, selected_items, time_taken, gap = solve_knapsack_bnb(items, capacity, return_indices=return_indices,
+                                                                         gap_rel=gap_rel, gap_abs=gap_abs,
+                                                                         heuristics=heuristics, heuristic_time=heuristic_time,
+                                                                         checkpoint_path=checkpoint_path,
+                                                                         checkpoint_interval=checkpoint_interval,
+                                                                         resume=resume)
 
     logger.info("\n--- Results ---")
     logger.info(f"Optimal Profit: {optimal_profit:.2f}")
@@ -310,8 +489,9 @@ def run_knapsack(csv_file):
         logger.info("  No items selected (perhaps capacity is too low or no items fit).")
 
     logger.info(f"Time Taken: {time_taken:.4f} seconds")
+    logger.info(f"Proven Gap: {gap:.6%}")
     
-    return optimal_profit, selected_items, time_taken
+    return optimal_profit, selected_items, time_taken, gap
 
 # --- Example Usage ---
 def test():
@@ -344,7 +524,7 @@ def test():
         logger.info("\nSolving...")
 
         # Solve the knapsack problem
-        optimal_profit, selected_items, time_taken = solve_knapsack_bnb(items, knapsack_capacity)
+        optimal_profit, selected_items, time_taken, gap = solve_knapsack_bnb(items, knapsack_capacity)
 
         logger.info("\n--- Results ---")
         logger.info(f"Optimal Profit: {optimal_profit:.2f}")
@@ -0,0 +1,139 @@
+# System imports
+import os
+import struct
+import zlib
+
+import numpy as np
+
+# Logging imports
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# File layout (little-endian):
+#   HEADER | zlib(incumbent bits | NODE records)
+# The incumbent has one bit per item, by original index. Each node stores the
+# decisions taken for the first `level` items in density order, one bit each:
+# the items after `level` have not been decided and are never selected.
+MAGIC = b"KPBB"
+VERSION = 1
+HEADER = struct.Struct("<4sHIdIdQdQ")  # magic, version, n_items, capacity, fingerprint,
+                                       # max_profit, nodes_explored, elapsed, stack size
+NODE = struct.Struct("<Iddd")  # level, profit, weight, bound
+
+
+def instance_fingerprint(items, capacity):
+    """
+    CRC32 of the sorted items and capacity, so a checkpoint is never resumed on another instance.
+
+    Args:
+        items (list): The items as used by the search, (profit, weight, original_index) tuples
+                      sorted by profit/weight ratio.
+        capacity (float): The maximum capacity of the knapsack.
+    """
+    data = np.asarray(items, dtype=float).tobytes() + struct.pack("<d", capacity)
+    return zlib.crc32(data)
+
+
+def save_checkpoint(path, items, capacity, stack, max_profit, selection, nodes_explored, elapsed):
+    """
+    Writes the state of the branch and bound search to `path`.
+
+    The file is written to a temporary path and then renamed, so an interruption
+    while saving never leaves a truncated checkpoint behind.
+
+    Args:
+        path (str): Checkpoint file path.
+        items (list): The items as used by the search, (profit, weight, original_index) tuples.
+        capacity (float): The maximum capacity of the knapsack.
+        stack (list): Open nodes, (level, profit, weight, selection, bound) tuples.
+        max_profit (float): Profit of the incumbent.
+        selection (list): Incumbent, a boolean per item by original index.
+        nodes_explored (int): Number of nodes explored so far.
+        elapsed (float): Search time so far in seconds.
+    """
+    order = np.asarray([item[2] for item in items], dtype=np.int64)
+    body = [np.packbits(np.asarray(selection, dtype=bool)).tobytes()]
+    for level, profit, weight, node_selection, bound in stack:
+        # Decisions in density order; only the first `level` can be set
+        decided = np.asarray(node_selection, dtype=bool)[order[:level]]
+        body.append(NODE.pack(level, profit, weight, bound))
+        body.append(np.packbits(decided).tobytes())
+
+    header = HEADER.pack(MAGIC, VERSION, len(items), capacity, instance_fingerprint(items, capacity),
+                         max_profit, nodes_explored, elapsed, len(stack))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(zlib.compress(b"".join(body), 1))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    logger.debug(f"Checkpoint saved to {path}: {len(stack)} open nodes, max_profit {max_profit:.2f}")
+
+
+def load_checkpoint(path, items, capacity):
+    """
+    Reads a checkpoint written by save_checkpoint for the same instance.
+
+    Args:
+        path (str): Checkpoint file path.
+        items (list): The items as used by the search, (profit, weight, original_index) tuples.
+        capacity (float): The maximum capacity of the knapsack.
+
+    Returns:
+        dict: stack, max_profit, selection, nodes_explored and elapsed, as passed to save_checkpoint.
+
+    Raises:
+        ValueError: If the file is not a checkpoint, is corrupted or belongs to another instance.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is not a branch and bound checkpoint (truncated).")
+    magic, version, n_items, saved_capacity, fingerprint, max_profit, nodes_explored, elapsed, stack_size = \
+        HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a branch and bound checkpoint (version {VERSION}).")
+    if n_items != len(items) or fingerprint != instance_fingerprint(items, capacity):
+        raise ValueError(f"Checkpoint {path} was saved for a different instance.")
+
+    try:
+        body = zlib.decompress(data[HEADER.size:])
+    except zlib.error as e:
+        raise ValueError(f"Checkpoint {path} is corrupted: {e}.")
+    n = len(items)
+    order = [item[2] for item in items]
+
+    incumbent_size = (n + 7) // 8
+    selection = np.unpackbits(np.frombuffer(body, dtype=np.uint8, count=incumbent_size))[:n].astype(bool).tolist()
+    offset = incumbent_size
+
+    stack = []
+    for _ in range(stack_size):
+        level, profit, weight, bound = NODE.unpack_from(body, offset)
+        offset += NODE.size
+        size = (level + 7) // 8
+        decided = np.unpackbits(np.frombuffer(body, dtype=np.uint8, count=size, offset=offset))[:level]
+        offset += size
+
+        node_selection = [False] * n
+        for k in np.nonzero(decided)[0]:
+            node_selection[order[k]] = True
+        stack.append((level, profit, weight, node_selection, bound))
+
+    logger.info(f"Checkpoint loaded from {path}: {stack_size} open nodes, max_profit {max_profit:.2f}, "
+                f"{nodes_explored} nodes explored in {elapsed:.2f} seconds")
+    return {
+        "stack": stack,
+        "max_profit": max_profit,
+        "selection": selection,
+        "nodes_explored": nodes_explored,
+        "elapsed": elapsed,
+    }
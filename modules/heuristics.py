@@ -0,0 +1,203 @@
+# System imports
+import time
+
+import numpy as np
+
+# Local imports
+from greedy import knapsack_guloso_indices
+from fptas import approximate_knapsack_anytime
+
+# Logging imports
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+HEURISTICS = ("greedy", "fptas", "local_search")
+
+# Number of items in each candidate pool of the 2-swap move
+SWAP_POOL_SIZE = 32
+
+# Relative margin added to the upper bound proven by the FPTAS pass
+BOUND_TOLERANCE = 1e-9
+
+
+def _best_one_swap(p, w, selected, residual):
+    """
+    Best move removing at most one selected item and adding one unselected item.
+
+    Returns:
+        tuple: (gain, removed index or -1, added index) or None if there is no improving move.
+    """
+    outside = np.nonzero(~selected)[0]
+    if len(outside) == 0:
+        return None
+
+    # Unselected items sorted by weight, with the running maximum profit, so the best
+    # item fitting in a given free capacity is found with a binary search.
+    order = outside[np.argsort(w[outside], kind="stable")]
+    sorted_weights = w[order]
+    running = np.maximum.accumulate(p[order])
+    # Position of the running maximum, to recover which item reaches it
+    positions = np.arange(len(order))
+    argmax = np.maximum.accumulate(np.where(p[order] >= running, positions, 0))
+
+    inside = np.nonzero(selected)[0]
+    removed = np.concatenate(([-1], inside))
+    free = residual + np.concatenate(([0.0], w[inside]))
+    lost = np.concatenate(([0.0], p[inside]))
+
+    position = np.searchsorted(sorted_weights, free, side="right") - 1
+    valid = position >= 0
+    if not valid.any():
+        return None
+    gain = np.full(len(removed), -np.inf)
+    gain[valid] = running[position[valid]] - lost[valid]
+
+    best = int(np.argmax(gain))
+    if gain[best] <= 0:
+        return None
+    return gain[best], int(removed[best]), int(order[argmax[position[best]]])
+
+
+def _best_two_swap(p, w, selected, residual, pool_size=SWAP_POOL_SIZE):
+    """
+    Best move exchanging one selected item for two unselected ones, or two selected
+    items for one unselected one. Only the pool_size least dense selected items and
+    the pool_size densest unselected items are considered.
+
+    Returns:
+        tuple: (gain, removed indices, added indices) or None if there is no improving move.
+    """
+    # Zero-weight items are the densest
+    density = np.divide(p, w, out=np.full(len(p), np.inf), where=w > 0)
+    inside = np.nonzero(selected)[0]
+    outside = np.nonzero(~selected)[0]
+    if len(inside) == 0 or len(outside) == 0:
+        return None
+    inside = inside[np.argsort(density[inside], kind="stable")[:pool_size]]
+    outside = outside[np.argsort(-density[outside], kind="stable")[:pool_size]]
+
+    best = None
+
+    # Remove one, add two
+    if len(outside) >= 2:
+        a, b = np.triu_indices(len(outside), k=1)
+        pair_p = p[outside[a]] + p[outside[b]]
+        pair_w = w[outside[a]] + w[outside[b]]
+        gain = pair_p[None, :] - p[inside][:, None]
+        gain[pair_w[None, :] > residual + w[inside][:, None]] = -np.inf
+        r, c = np.unravel_index(int(np.argmax(gain)), gain.shape)
+        if gain[r, c] > 0:
+            best = (gain[r, c], [int(inside[r])], [int(outside[a[c]]), int(outside[b[c]])])
+
+    # Remove two, add one
+    if len(inside) >= 2:
+        a, b = np.triu_indices(len(inside), k=1)
+        pair_p = p[inside[a]] + p[inside[b]]
+        pair_w = w[inside[a]] + w[inside[b]]
+        gain = p[outside][:, None] - pair_p[None, :]
+        gain[w[outside][:, None] > residual + pair_w[None, :]] = -np.inf
+        r, c = np.unravel_index(int(np.argmax(gain)), gain.shape)
+        if gain[r, c] > 0 and (best is None or gain[r, c] > best[0]):
+            best = (gain[r, c], [int(inside[a[c]]), int(inside[b[c]])], [int(outside[r])])
+
+    return best
+
+
+def local_search(profits, weights, capacity, indices, time_limit_seconds=1.0):
+    """
+    Improves a feasible solution with 1-swap and 2-swap moves until no move
+    improves it or the time limit is reached.
+
+    Args:
+        profits (list): Profit of each item.
+        weights (list): Weight of each item.
+        capacity (float): The maximum capacity of the knapsack.
+        indices (list): Indices of the items of the starting solution.
+        time_limit_seconds (float): Optional. The maximum time allowed in seconds.
+
+    Returns:
+        tuple: (profit, indices) of the improved solution.
+    """
+    deadline = time.perf_counter() + time_limit_seconds
+    p = np.asarray(profits, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    selected = np.zeros(len(p), dtype=bool)
+    selected[list(indices)] = True
+    residual = capacity - w[selected].sum()
+    moves = 0
+
+    while time.perf_counter() < deadline:
+        move = _best_one_swap(p, w, selected, residual)
+        if move is not None:
+            _, removed, added = move
+            removed = [removed] if removed >= 0 else []
+            added = [added]
+        else:
+            move = _best_two_swap(p, w, selected, residual)
+            if move is None:
+                break
+            _, removed, added = move
+
+        selected[removed] = False
+        selected[added] = True
+        residual += w[removed].sum() - w[added].sum()
+        moves += 1
+
+    indices = [int(i) for i in np.nonzero(selected)[0]]
+    logger.debug(f"Local search applied {moves} moves.")
+    return sum(profits[i] for i in indices), indices
+
+
+def initial_solution(items_data, capacity, heuristics=HEURISTICS, time_limit_seconds=1.0):
+    """
+    Runs the heuristic stage ahead of the exact search and returns its best solution.
+
+    The time limit is split between the FPTAS pass and the local search. The local
+    search starts from the best solution found by the previous heuristics.
+
+    Args:
+        items_data (list): A list of tuples, where each tuple is (profit, weight).
+        capacity (float): The maximum capacity of the knapsack.
+        heuristics (tuple): Optional. Heuristics to run, any of HEURISTICS.
+        time_limit_seconds (float): Optional. Time slice for the whole stage in seconds.
+
+    Returns:
+        tuple: (profit, indices, upper_bound)
+               profit (float), indices (list): The best solution found.
+               upper_bound (float): Upper bound on the optimal profit proven by the FPTAS
+                                    pass (profit / proven ratio), inf if it did not run.
+    """
+    unknown = set(heuristics) - set(HEURISTICS)
+    if unknown:
+        raise ValueError(f"Unknown heuristics: {sorted(unknown)}. Available: {HEURISTICS}")
+
+    deadline = time.perf_counter() + time_limit_seconds
+    profits = [p for p, _ in items_data]
+    weights = [w for _, w in items_data]
+    best_profit, best_indices = 0, []
+    upper_bound = float('inf')
+
+    if "greedy" in heuristics:
+        best_profit, best_indices = knapsack_guloso_indices(profits, weights, capacity)
+        logger.debug(f"Greedy heuristic: {best_profit}")
+
+    if "fptas" in heuristics and profits:
+        budget = (deadline - time.perf_counter()) / (2 if "local_search" in heuristics else 1)
+        profit, indices, epsilon, ratio = approximate_knapsack_anytime(profits, weights, capacity, max(budget, 0))
+        logger.debug(f"FPTAS heuristic: {profit} (epsilon {epsilon}, proven ratio {ratio:.4f})")
+        if ratio > 0:
+            # profit / ratio is rounded; widen it so flooring it for integer profits stays safe
+            upper_bound = max(profit / ratio * (1 + BOUND_TOLERANCE), profit)
+        if profit > best_profit:
+            best_profit, best_indices = profit, indices
+
+    if "local_search" in heuristics and profits:
+        profit, indices = local_search(profits, weights, capacity, best_indices,
+                                       max(deadline - time.perf_counter(), 0))
+        logger.debug(f"Local search heuristic: {profit}")
+        if profit > best_profit:
+            best_profit, best_indices = profit, indices
+
+    return best_profit, best_indices, upper_bound
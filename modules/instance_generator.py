@@ -0,0 +1,270 @@
+# System imports
+import os
+import math
+import argparse
+
+import numpy as np
+
+# Logging imports
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Instance classes from Pisinger, "Where are the hard knapsack problems?".
+# The number is the one used in the knapPI_<class>_<n>_<R>_<h> file names.
+UNCORRELATED = 1
+WEAKLY_CORRELATED = 2
+STRONGLY_CORRELATED = 3
+INVERSE_STRONGLY_CORRELATED = 4
+ALMOST_STRONGLY_CORRELATED = 5
+SUBSET_SUM = 6
+
+INSTANCE_CLASSES = {
+    UNCORRELATED: "uncorrelated",
+    WEAKLY_CORRELATED: "weakly correlated",
+    STRONGLY_CORRELATED: "strongly correlated",
+    INVERSE_STRONGLY_CORRELATED: "inverse strongly correlated",
+    ALMOST_STRONGLY_CORRELATED: "almost strongly correlated",
+    SUBSET_SUM: "subset sum",
+}
+
+DEFAULT_CHUNK_SIZE = 1 << 18
+# Items are drawn in blocks of this size, each from its own child seed, so the
+# instance only depends on the seed and not on chunk_size
+SEED_BLOCK = 1 << 16
+
+# Instances up to this many items get their reference solution from branch and
+# bound; larger ones from the heuristics stage alone, since every B&B node keeps
+# a copy of the selection.
+REFERENCE_BNB_ITEMS = 20000
+DEFAULT_REFERENCE_TIME = 60.0
+
+# File with the best profit found when it is not proven optimal, `<dir>-best-known/<name>`
+BEST_KNOWN_SUFFIX = "-best-known"
+
+
+def instance_name(instance_class: int, n: int, data_range: int = 1000, instance: int = 1) -> str:
+    """
+    File name following the convention of the bundled instances.
+    """
+    return f"knapPI_{instance_class}_{n}_{data_range}_{instance}"
+
+
+def _generate_chunk(rng, instance_class: int, size: int, data_range: int):
+    """
+    Generate `size` items of the given class.
+
+    Returns:
+        tuple: (profits, weights) as int64 numpy arrays.
+    """
+    r10 = data_range // 10
+
+    if instance_class == INVERSE_STRONGLY_CORRELATED:
+        profits = rng.integers(1, data_range, size=size, endpoint=True)
+        return profits, profits + r10
+
+    weights = rng.integers(1, data_range, size=size, endpoint=True)
+    if instance_class == UNCORRELATED:
+        profits = rng.integers(1, data_range, size=size, endpoint=True)
+    elif instance_class == WEAKLY_CORRELATED:
+        profits = np.maximum(weights + rng.integers(-r10, r10, size=size, endpoint=True), 1)
+    elif instance_class == STRONGLY_CORRELATED:
+        profits = weights + r10
+    elif instance_class == ALMOST_STRONGLY_CORRELATED:
+        r500 = data_range // 500
+        profits = weights + r10 + rng.integers(-r500, r500, size=size, endpoint=True)
+    elif instance_class == SUBSET_SUM:
+        profits = weights.copy()
+    else:
+        raise ValueError(f"Unknown instance class: {instance_class}")
+    return profits, weights
+
+
+def _iter_chunks(instance_class: int, n: int, data_range: int, seed, chunk_size: int):
+    # The same seed gives the same items, so the file can be produced in two
+    # passes without keeping the items in memory. Chunks are made of whole
+    # SEED_BLOCK blocks, the last one excepted.
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    block_seeds = seed.spawn((n + SEED_BLOCK - 1) // SEED_BLOCK)
+    blocks_per_chunk = max(1, chunk_size // SEED_BLOCK)
+    for first in range(0, len(block_seeds), blocks_per_chunk):
+        blocks = []
+        for k in range(first, min(first + blocks_per_chunk, len(block_seeds))):
+            size = min(SEED_BLOCK, n - k * SEED_BLOCK)
+            blocks.append(_generate_chunk(np.random.default_rng(block_seeds[k]), instance_class, size, data_range))
+        yield np.concatenate([b[0] for b in blocks]), np.concatenate([b[1] for b in blocks])
+
+
+def generate_items(n: int, instance_class: int, data_range: int = 1000, seed=None):
+    """
+    Generate the items of a synthetic instance in memory, the same ones that
+    generate_instance writes for the same seed.
+
+    Returns:
+        tuple: (profits, weights) as lists of ints.
+    """
+    if instance_class not in INSTANCE_CLASSES:
+        raise ValueError(f"Unknown instance class: {instance_class}")
+    profits, weights = [], []
+    for chunk_profits, chunk_weights in _iter_chunks(instance_class, n, data_range, seed, DEFAULT_CHUNK_SIZE):
+        profits.extend(chunk_profits.tolist())
+        weights.extend(chunk_weights.tolist())
+    return profits, weights
+
+
+def optimum_path(path: str, suffix: str = "-optimum") -> str:
+    """
+    Path of the optimum file of an instance, `<dir>-optimum/<name>` as in the bundled sets.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory + suffix, name)
+
+
+def reference_solution(profits, weights, capacity, time_limit_seconds: float = DEFAULT_REFERENCE_TIME):
+    """
+    Best solution found within the time limit, written with the instance as its
+    solution line and optimum file.
+
+    Returns:
+        tuple: (profit, indices, gap), gap > 0 if the profit is not proven optimal.
+    """
+    # The solvers are only needed when a reference is requested
+    from modules.heuristics import HEURISTICS, initial_solution
+    import modules.branch_and_bound as bb_module
+
+    items = list(zip(profits, weights))
+    if len(items) <= REFERENCE_BNB_ITEMS:
+        profit, indices, _, gap = bb_module.solve_knapsack_bnb(
+            items, capacity, time_limit_seconds, return_indices=True, heuristics=HEURISTICS,
+            heuristic_time=min(1.0, time_limit_seconds / 2), show_progress=False)
+        return profit, indices, gap
+
+    profit, indices, upper_bound = initial_solution(items, capacity, time_limit_seconds=time_limit_seconds)
+    if not math.isfinite(upper_bound):
+        return profit, indices, 1.0
+    # The generated profits are integers, so is the optimum
+    upper_bound = math.floor(upper_bound)
+    return profit, indices, (upper_bound - profit) / upper_bound if upper_bound > 0 else 0.0
+
+
+def generate_instance(path: str, n: int, instance_class: int, data_range: int = 1000,
+                      instance: int = 1, series: int = 100, seed=None,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE, reference_time: float = None):
+    """
+    Generate a synthetic instance and stream it to disk.
+
+    The file uses the same format as the bundled instances: a header line
+    `n capacity` followed by one `profit weight` line per item. The capacity
+    is `instance / (series + 1)` of the total weight, as in Pisinger's
+    generator (the bundled files use series=100, instance=1).
+
+    With reference_time, the instance is solved for that many seconds and,
+    like the bundled large_scale files, ends with a solution line (one 0/1 per
+    item). If the profit is proven optimal it is written to the optimum file
+    (see optimum_path), which main.py requires and main2.py/main3.py compare
+    against; otherwise it goes to `<dir>-best-known/<name>` and a warning is
+    logged. Solving holds every item in memory. Without reference_time no
+    solution line is written, and the instances must not be placed in a
+    large_scale directory: main2.py and main3.py drop the last line of those files.
+
+    Items are generated in chunks of `chunk_size`, twice: the first pass only
+    sums the weights to compute the capacity, the second one writes the file.
+    The items only depend on the seed, not on chunk_size.
+
+    Args:
+        path (str): Output file path.
+        n (int): Number of items.
+        instance_class (int): One of the classes in INSTANCE_CLASSES.
+        data_range (int): Profits and weights are drawn from [1, data_range].
+        instance (int): Instance number h of the series.
+        series (int): Number of instances H in the series.
+        seed (int): Optional. Seed of the random generator. By default it is
+                    derived from the other parameters, so the same instance
+                    is always generated for the same arguments.
+        chunk_size (int): Number of items generated at a time, rounded down to
+                          a multiple of SEED_BLOCK.
+        reference_time (float): Optional. Seconds to solve the instance for the
+                                solution line and the optimum file.
+
+    Returns:
+        tuple: (n, capacity, reference_profit, gap), reference_profit and gap are
+               None without reference_time; gap is 0.0 if the profit is optimal.
+    """
+    if instance_class not in INSTANCE_CLASSES:
+        raise ValueError(f"Unknown instance class: {instance_class}")
+    if seed is None:
+        seed = [instance_class, n, data_range, instance]
+
+    total_weight = 0
+    for _, weights in _iter_chunks(instance_class, n, data_range, seed, chunk_size):
+        total_weight += int(weights.sum())
+    capacity = instance * total_weight // (series + 1)
+
+    reference_profit = gap = None
+    if reference_time is not None:
+        profits, weights = generate_items(n, instance_class, data_range, seed)
+        reference_profit, indices, gap = reference_solution(profits, weights, capacity, reference_time)
+        del profits, weights
+        if gap > 0:
+            logger.warning(f"Reference profit {reference_profit} of {path} is not proven optimal "
+                           f"(gap {gap:.4%}), it is written to {optimum_path(path, BEST_KNOWN_SUFFIX)} "
+                           f"instead of the optimum file; increase reference_time")
+        solution = np.zeros(n, dtype=np.int8)
+        solution[indices] = 1
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    logger.info(f"Generating {INSTANCE_CLASSES[instance_class]} instance with {n} items and capacity {capacity}: {path}")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(f"{n} {capacity}\n")
+        for profits, weights in _iter_chunks(instance_class, n, data_range, seed, chunk_size):
+            f.write("\n".join(f"{p} {w}" for p, w in zip(profits.tolist(), weights.tolist())))
+            f.write("\n")
+        if reference_profit is not None:
+            f.write(" ".join(map(str, solution.tolist())))
+            f.write("\n")
+    os.replace(tmp_path, path)
+
+    if reference_profit is not None:
+        reference_path = optimum_path(path, "-optimum" if gap == 0 else BEST_KNOWN_SUFFIX)
+        os.makedirs(os.path.dirname(reference_path), exist_ok=True)
+        with open(reference_path, "w") as f:
+            f.write(f"{reference_profit}\n")
+
+    return n, capacity, reference_profit, gap
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic knapsack instances (Pisinger classes).")
+    parser.add_argument("output_dir", help="Directory where the instances are written.")
+    parser.add_argument("-n", "--items", type=int, nargs="+", required=True, help="Number of items of each instance.")
+    parser.add_argument("-c", "--classes", type=int, nargs="+", default=[UNCORRELATED, WEAKLY_CORRELATED, STRONGLY_CORRELATED],
+                        choices=sorted(INSTANCE_CLASSES), help="Instance classes to generate.")
+    parser.add_argument("-r", "--range", type=int, default=1000, dest="data_range", help="Range R of profits and weights.")
+    parser.add_argument("--instance", type=int, default=1, help="Instance number h of the series.")
+    parser.add_argument("--series", type=int, default=100, help="Number of instances H of the series.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the random generator.")
+    parser.add_argument("--reference-time", type=float, default=0,
+                        help="Seconds spent solving each instance for its solution line and "
+                             "<output_dir>-optimum file (<output_dir>-best-known if optimality "
+                             f"is not proven), e.g. {DEFAULT_REFERENCE_TIME:g}. Holds every item "
+                             "in memory. By default (0) the instances are only streamed to disk.")
+    args = parser.parse_args()
+
+    for n in args.items:
+        for instance_class in args.classes:
+            path = os.path.join(args.output_dir, instance_name(instance_class, n, args.data_range, args.instance))
+            _, capacity, reference_profit, gap = generate_instance(path, n, instance_class, args.data_range,
+                                                                   args.instance, args.series, args.seed,
+                                                                   reference_time=args.reference_time or None)
+            reference = "" if reference_profit is None else f", reference profit={reference_profit} (gap {gap:.4%})"
+            print(f"{path}: n={n}, capacity={capacity}{reference}")
+
+
+if __name__ == "__main__":
+    main()
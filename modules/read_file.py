@@ -4,6 +4,9 @@ import os
 # Logging import 
 import logging
 
+# Replaced by the runner scripts with their configured logger
+logger = logging.getLogger(__name__)
+
 
 def get_files(dataset_dir: str, optimum_dir: str):
     logger.debug(f"getting files from dataset directory: {dataset_dir} and optimum directory: {optimum_dir}")
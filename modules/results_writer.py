@@ -0,0 +1,208 @@
+# System imports
+import os
+import csv
+import struct
+
+# Logging imports
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Sidecar record layout (little-endian):
+#   name_len (uint16) | encoding (uint8) | n_items (uint32) | payload_len (uint32)
+#   name (utf-8, name_len bytes) | payload (payload_len bytes)
+RECORD_HEADER = struct.Struct("<HBII")
+ENCODING_INDICES = 0  # uint32 array with the selected indices
+ENCODING_BITMASK = 1  # one bit per item, bit i set if item i is selected
+
+SELECTION_COLUMN = "selection_offset"
+
+
+def encode_selection(indices, n_items: int):
+    """
+    Encode a list of selected indices in the most compact form.
+
+    Args:
+        indices (list): Indices of the selected items.
+        n_items (int): Total number of items of the instance.
+
+    Returns:
+        tuple: (encoding, payload) where payload is a bytes object.
+    """
+    index_size = 4 * len(indices)
+    bitmask_size = (n_items + 7) // 8
+    if index_size <= bitmask_size:
+        return ENCODING_INDICES, struct.pack(f"<{len(indices)}I", *sorted(indices))
+
+    mask = bytearray(bitmask_size)
+    for i in indices:
+        mask[i >> 3] |= 1 << (i & 7)
+    return ENCODING_BITMASK, bytes(mask)
+
+
+def decode_selection(encoding: int, payload: bytes, n_items: int):
+    """
+    Decode a payload produced by encode_selection back into a list of indices.
+    """
+    if encoding == ENCODING_INDICES:
+        return list(struct.unpack(f"<{len(payload) // 4}I", payload))
+    if encoding == ENCODING_BITMASK:
+        return [i for i in range(n_items) if payload[i >> 3] >> (i & 7) & 1]
+    raise ValueError(f"Unknown selection encoding: {encoding}")
+
+
+def read_selection(sidecar_path: str, offset: int):
+    """
+    Read a single selection from the sidecar file.
+
+    Args:
+        sidecar_path (str): Path to the binary sidecar file.
+        offset (int): Byte offset of the record, as stored in the CSV.
+
+    Returns:
+        tuple: (name, indices)
+    """
+    with open(sidecar_path, "rb") as f:
+        f.seek(offset)
+        name_len, encoding, n_items, payload_len = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+        name = f.read(name_len).decode("utf-8")
+        payload = f.read(payload_len)
+    return name, decode_selection(encoding, payload, n_items)
+
+
+def _fsync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+
+class ResultsWriter:
+    """
+    Append-only results writer.
+
+    Each call to write() appends one CSV row and flushes it to disk, so a
+    crash in the middle of a sweep keeps every instance already finished.
+    Selected items are not stored in the CSV: they go to a binary sidecar
+    (`<csv>.sel`) and the CSV only keeps the byte offset of the record.
+
+    The CSV keeps the layout of the previous results files: the first column
+    (with an empty header) is the instance name, followed by `columns`.
+    """
+
+    def __init__(self, csv_path: str, columns: list, delimiter: str = ";", resume: bool = True):
+        """
+        Args:
+            csv_path (str): Path to the CSV file.
+            columns (list): Column names after the instance name column.
+            delimiter (str): CSV delimiter.
+            resume (bool): Keep the rows of an existing file and skip their
+                           instances. If False the file is started from scratch.
+        """
+        self.csv_path = csv_path
+        self.sidecar_path = csv_path + ".sel"
+        self.columns = list(columns)
+        self.delimiter = delimiter
+        self.header = [""] + self.columns
+        self.completed = set()
+
+        directory = os.path.dirname(csv_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if resume:
+            self._load_existing()
+        else:
+            for path in (self.csv_path, self.sidecar_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        new_file = not os.path.exists(self.csv_path)
+        # True if this run continues an existing results file
+        self.resumed = not new_file
+        self._csv_file = open(self.csv_path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._csv_file, delimiter=self.delimiter)
+        self._sidecar = None
+        if new_file:
+            self._writer.writerow(self.header)
+            _fsync(self._csv_file)
+
+        if self.completed:
+            logger.info(f"Resuming {self.csv_path}: {len(self.completed)} instances already done.")
+
+    def _load_existing(self):
+        if not os.path.exists(self.csv_path):
+            return
+
+        with open(self.csv_path, "r", newline="", encoding="utf-8") as f:
+            content = f.read()
+        rows = list(csv.reader(content.splitlines(), delimiter=self.delimiter))
+
+        if not rows or rows[0] != self.header:
+            # File from an older layout, keep it aside instead of mixing formats
+            backup_path = self.csv_path + ".old"
+            logger.warning(f"Existing results file {self.csv_path} has a different header, moving it to {backup_path}")
+            os.replace(self.csv_path, backup_path)
+            if os.path.exists(self.sidecar_path):
+                os.replace(self.sidecar_path, backup_path + ".sel")
+            return
+
+        # A row cut by a crash has fewer fields or no line ending, it is dropped and redone
+        complete_rows = [row for row in rows[1:] if len(row) == len(self.header)]
+        if len(rows) > 1 and not content.endswith("\n") and complete_rows and complete_rows[-1] is rows[-1]:
+            complete_rows.pop()
+        self.completed = {row[0] for row in complete_rows}
+        if len(complete_rows) != len(rows) - 1:
+            logger.warning(f"Dropping {len(rows) - 1 - len(complete_rows)} incomplete rows from {self.csv_path}")
+            with open(self.csv_path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f, delimiter=self.delimiter)
+                writer.writerow(self.header)
+                writer.writerows(complete_rows)
+
+    def is_done(self, name: str) -> bool:
+        return name in self.completed
+
+    def write(self, name: str, row: dict, selection=None, n_items: int = 0):
+        """
+        Append the results of one instance and flush them to disk.
+
+        Args:
+            name (str): Instance name.
+            row (dict): Values for the columns given in the constructor. The
+                        selection column, if present, is filled by the writer.
+            selection (list): Optional indices of the selected items.
+            n_items (int): Number of items of the instance, used to pick the
+                           selection encoding.
+        """
+        values = dict(row)
+        if selection is not None:
+            values[SELECTION_COLUMN] = self._write_selection(name, selection, max(n_items, max(selection, default=-1) + 1))
+
+        self._writer.writerow([name] + [values.get(column, "") for column in self.columns])
+        _fsync(self._csv_file)
+        self.completed.add(name)
+
+    def _write_selection(self, name: str, selection, n_items: int) -> int:
+        if self._sidecar is None:
+            self._sidecar = open(self.sidecar_path, "ab")
+        encoding, payload = encode_selection(selection, n_items)
+        name_bytes = name.encode("utf-8")
+
+        self._sidecar.seek(0, os.SEEK_END)
+        offset = self._sidecar.tell()
+        self._sidecar.write(RECORD_HEADER.pack(len(name_bytes), encoding, n_items, len(payload)))
+        self._sidecar.write(name_bytes)
+        self._sidecar.write(payload)
+        # The selection must be on disk before the CSV row that points to it
+        _fsync(self._sidecar)
+        return offset
+
+    def close(self):
+        self._csv_file.close()
+        if self._sidecar is not None:
+            self._sidecar.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
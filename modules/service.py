@@ -0,0 +1,523 @@
+# System imports
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Local imports
+from modules.api import solve
+
+# Logging imports
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Protocol: one JSON object per line, in both directions. A client may send
+# several jobs on the same connection; results are written back as soon as
+# each one is ready, so they may come back in a different order.
+#
+# Job:    {"id": ..., "algorithm": "bnb", "items": [[profit, weight], ...],
+#          "capacity": c, "params": {...}, "deadline": seconds}
+# Result: {"id": ..., "status": "ok" | "timeout" | "error", "profit": ...,
+#          "selected": [indices], "solve_time": seconds, ...}
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_DEADLINE = 60.0
+
+# Solver parameters a client may set, per algorithm. Every algorithm served runs
+# under the job's deadline: the fixed-epsilon fptas has no time limit, so it is not
+# served (use fptas_anytime), and greedy is a single sort of the items. Anything
+# else, e.g. checkpoint_path or resume for bnb, is rejected: any local process can
+# send jobs.
+JOB_PARAMS = {
+    "bnb": {"time_limit_seconds", "gap_rel", "gap_abs", "heuristics", "heuristic_time"},
+    "fptas_anytime": {"tempo_limite", "epsilon_inicial", "fator", "epsilon_minimo"},
+    "greedy": set(),
+}
+ALGORITHMS = tuple(JOB_PARAMS)
+
+# Jobs up to this many items are grouped and sent to a worker together. In a
+# batch each job runs for at most BATCH_TIME_LIMIT seconds, so one hard job
+# cannot hold up the others; a job that uses it all is sent again on its own.
+SMALL_JOB_ITEMS = 1000
+BATCH_TIME_LIMIT = 0.01
+BATCH_SIZE = 16
+BATCH_WINDOW = 0.002  # seconds to wait for more small jobs before sending a batch
+# Extra time given to a worker past the deadline before the job is reported as timed out
+DEADLINE_GRACE = 0.5
+
+
+# --- Worker side -------------------------------------------------------------
+
+def _init_worker():
+    # The solvers import numpy, the heuristics and the checkpoint code lazily;
+    # load them once here so no request pays for it
+    import numpy
+    import modules.heuristics
+    import modules.checkpoint
+
+    # Per-solve progress messages would flood the server output
+    logging.getLogger("modules.branch_and_bound").setLevel(logging.WARNING)
+
+
+def _warm_up():
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def validate_job(job):
+    """
+    Checks a job received from a client before it is queued.
+
+    Raises:
+        ValueError: If the job is malformed, the algorithm is not served or a
+                    parameter is not allowed for it.
+    """
+    if not isinstance(job, dict) or "items" not in job or "capacity" not in job:
+        raise ValueError("a job needs 'items' and 'capacity'")
+    if not isinstance(job["items"], list):
+        raise ValueError("'items' must be a list of [profit, weight] pairs")
+    algorithm = job.get("algorithm", "bnb")
+    if algorithm not in JOB_PARAMS:
+        raise ValueError(f"unknown algorithm '{algorithm}', available: {ALGORITHMS}")
+    params = job.get("params") or {}
+    if not isinstance(params, dict):
+        raise ValueError("'params' must be an object")
+    unknown = set(params) - JOB_PARAMS[algorithm]
+    if unknown:
+        raise ValueError(f"parameters not allowed for {algorithm}: {sorted(unknown)}, "
+                         f"allowed: {sorted(JOB_PARAMS[algorithm])}")
+    seconds = {"deadline": job.get("deadline", 0)}
+    seconds.update((name, params[name]) for name in ("time_limit_seconds", "tempo_limite", "heuristic_time")
+                   if name in params)
+    for name, value in seconds.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"'{name}' must be a number of seconds")
+
+
+def _time_limit(job, deadline):
+    """
+    Time limit of a job in seconds: the one it asks for, capped by its deadline.
+    None for greedy, which takes none.
+    """
+    if job.get("algorithm", "bnb") == "greedy":
+        return None
+    params = job.get("params") or {}
+    requested = params.get("time_limit_seconds", params.get("tempo_limite", float('inf')))
+    return min(requested, deadline - time.time())
+
+
+def _solve(job, deadline, cap=None):
+    """
+    Solves a single job inside a worker process.
+
+    Args:
+        job (dict): The job as received from the client.
+        deadline (float): Absolute deadline (time.time()) of the job.
+        cap (float): Optional. Maximum time limit, for jobs solved in a batch.
+
+    Returns:
+        dict: The result sent back to the client, with status "retry" if the job
+              used up the cap and should be solved again on its own.
+    """
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        return {"id": job.get("id"), "status": "timeout"}
+
+    algorithm = job.get("algorithm", "bnb")
+    params = dict(job.get("params") or {})
+    time_limit = _time_limit(job, deadline)
+    capped = cap is not None and time_limit is not None and time_limit > cap
+    if capped:
+        time_limit = cap
+    params.pop("time_limit_seconds", None)
+    params.pop("tempo_limite", None)
+    if "heuristic_time" in params:
+        # The heuristics stage must fit in the time limit as well
+        params["heuristic_time"] = min(params["heuristic_time"], time_limit)
+
+    result = {"id": job.get("id"), "status": "ok"}
+    result.update(solve(job["items"], job["capacity"], algorithm, time_limit, **params))
+    if capped and result["solve_time"] >= cap:
+        # Stopped by the cap rather than its own limit: not the answer the client asked for
+        return {"id": job.get("id"), "status": "retry"}
+    return result
+
+
+def _solve_batch(batch, cap=None):
+    """
+    Solves a list of (job, deadline) pairs in a worker process, one result per job.
+    """
+    results = []
+    for job, deadline in batch:
+        try:
+            results.append(_solve(job, deadline, cap))
+        except Exception as e:
+            results.append({"id": job.get("id"), "status": "error", "error": f"{type(e).__name__}: {e}"})
+    return results
+
+
+# --- Server side -------------------------------------------------------------
+
+class SolveServer:
+    """
+    Asyncio server that runs knapsack jobs on a pool of warm worker processes.
+    The solvers are imported by this module, so workers start with them loaded.
+
+    Small jobs are grouped in batches to save on inter-process overhead, each
+    with a short time limit; larger jobs, and small ones that need more time,
+    go to the pool on their own. Each job has a deadline, passed to the
+    solvers as their time limit and enforced when waiting for the result. If a
+    worker dies (e.g. out of memory), its jobs fail and the pool is replaced.
+    """
+
+    def __init__(self, workers=None, batch_size=BATCH_SIZE, batch_window=BATCH_WINDOW,
+                 small_job_items=SMALL_JOB_ITEMS, batch_time_limit=BATCH_TIME_LIMIT,
+                 default_deadline=DEFAULT_DEADLINE):
+        """
+        Args:
+            workers (int): Optional. Number of worker processes, os.cpu_count() by default.
+            batch_size (int): Optional. Maximum number of small jobs per batch.
+            batch_window (float): Optional. Seconds to wait for more small jobs.
+            small_job_items (int): Optional. Jobs with up to this many items are batched.
+            batch_time_limit (float): Optional. Time limit of each job inside a batch.
+            default_deadline (float): Optional. Deadline in seconds of jobs that do not set one.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.small_job_items = small_job_items
+        self.batch_time_limit = batch_time_limit
+        self.default_deadline = default_deadline
+        self.pool = None
+        self.server = None
+        self._queue = None
+        self._batcher = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        """
+        Starts the worker pool and listens on a Unix socket, if unix_path is given,
+        or on host:port. Use port=0 to pick a free port, see `address`.
+        """
+        await self._warm_up_pool(self._new_pool())
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._run_batcher())
+        if unix_path:
+            self.server = await asyncio.start_unix_server(self._handle_client, path=unix_path)
+        else:
+            self.server = await asyncio.start_server(self._handle_client, host=host, port=port)
+        logger.info(f"Listening on {self.address}")
+        return self
+
+    @property
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    def _new_pool(self):
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self.pool
+
+    async def _warm_up_pool(self, pool):
+        loop = asyncio.get_running_loop()
+        # Spawn every worker now instead of on the first requests
+        pids = await asyncio.gather(*(loop.run_in_executor(pool, _warm_up) for _ in range(self.workers)))
+        logger.info(f"Started {len(set(pids))} worker processes")
+
+    def _restart_pool(self, broken):
+        """
+        Replaces the pool after one of its workers died, once per broken pool.
+        """
+        if self.pool is not broken:
+            return
+        logger.warning("A worker process died, restarting the worker pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+        # Jobs submitted from now on go to the new pool while it warms up
+        task = asyncio.get_running_loop().create_task(self._warm_up_pool(self._new_pool()))
+        task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self._batcher.cancel()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def _run_batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            batch_deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = batch_deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self._submit(batch, self.batch_time_limit)
+
+    def _submit(self, entries, cap=None):
+        """
+        Sends (job, deadline, future) entries to the pool as a single task. With
+        cap, jobs that use up their capped time limit are submitted again alone.
+        """
+        loop = asyncio.get_running_loop()
+        batch = [(job, deadline) for job, deadline, _ in entries]
+        pool = self.pool
+        try:
+            task = loop.run_in_executor(pool, _solve_batch, batch, cap)
+        except BrokenProcessPool:
+            # The pool broke since the last submit: replace it and submit again
+            self._restart_pool(pool)
+            pool = self.pool
+            task = loop.run_in_executor(pool, _solve_batch, batch, cap)
+
+        def done(task):
+            if not task.cancelled() and isinstance(task.exception(), BrokenProcessPool):
+                self._restart_pool(pool)
+            if task.cancelled() or task.exception() is not None:
+                error = "cancelled" if task.cancelled() else f"{type(task.exception()).__name__}: {task.exception()}"
+                results = [{"id": job.get("id"), "status": "error", "error": error} for job, _, _ in entries]
+            else:
+                results = task.result()
+            for entry, result in zip(entries, results):
+                if entry[2].done():
+                    continue
+                if result["status"] == "retry":
+                    self._submit([entry])
+                else:
+                    entry[2].set_result(result)
+
+        task.add_done_callback(done)
+
+    async def _run_job(self, job, send):
+        deadline = time.time() + float(job.get("deadline", self.default_deadline))
+        future = asyncio.get_running_loop().create_future()
+        if len(job["items"]) <= self.small_job_items:
+            await self._queue.put((job, deadline, future))
+        else:
+            self._submit([(job, deadline, future)])
+
+        try:
+            result = await asyncio.wait_for(future, max(deadline - time.time(), 0) + DEADLINE_GRACE)
+        except asyncio.TimeoutError:
+            result = {"id": job.get("id"), "status": "timeout"}
+        await send(result)
+
+    async def _handle_client(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def send(result):
+            async with lock:
+                writer.write(json.dumps(result).encode() + b"\n")
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                job = None
+                try:
+                    job = json.loads(line)
+                    validate_job(job)
+                except ValueError as e:
+                    job_id = job.get("id") if isinstance(job, dict) else None
+                    await send({"id": job_id, "status": "error", "error": f"Invalid job: {e}"})
+                    continue
+                task = asyncio.create_task(self._run_job(job, send))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+
+# --- Client side -------------------------------------------------------------
+
+class SolveClient:
+    """
+    Client for SolveServer. Several solve() calls can run concurrently on the
+    same connection; results are matched to them by job id.
+    """
+
+    def __init__(self):
+        self._ids = itertools.count()
+        self._pending = {}
+        self._reader_task = None
+        self.reader = None
+        self.writer = None
+
+    async def connect(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        if unix_path:
+            self.reader, self.writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(host, port)
+        self._reader_task = asyncio.create_task(self._read_results())
+        return self
+
+    async def _read_results(self):
+        while line := await self.reader.readline():
+            result = json.loads(line)
+            future = self._pending.pop(result.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(result)
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Connection closed by the server"))
+
+    async def solve(self, items, capacity, algorithm="bnb", params=None, deadline=DEFAULT_DEADLINE):
+        """
+        Sends a job and waits for its result.
+
+        Args:
+            items (list): (profit, weight) pairs.
+            capacity (float): The maximum capacity of the knapsack.
+            algorithm (str): Optional. One of ALGORITHMS.
+            params (dict): Optional. Keyword arguments for the solver.
+            deadline (float): Optional. Seconds the server has to answer.
+
+        Returns:
+            dict: The result, see the protocol at the top of this module.
+        """
+        job_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[job_id] = future
+        job = {"id": job_id, "algorithm": algorithm, "items": [list(item) for item in items],
+               "capacity": capacity, "params": params or {}, "deadline": deadline}
+        self.writer.write(json.dumps(job).encode() + b"\n")
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self._reader_task.cancel()
+
+
+# --- Load generator ------------------------------------------------------------
+
+async def run_load(requests=1000, concurrency=16, connections=4, n_items=100, algorithm="bnb",
+                   instance_class=1, params=None, deadline=DEFAULT_DEADLINE, seed=0,
+                   host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+    """
+    Sends `requests` random jobs to a running server, at most `concurrency` at a
+    time over `connections` connections, and measures throughput and latency.
+
+    Returns:
+        dict: Request counts per status, throughput (requests/s) and latency percentiles (ms).
+    """
+    import numpy as np
+    from modules.instance_generator import generate_items
+
+    # A small pool of instances, generated before the clock starts
+    instances = []
+    for k in range(min(requests, 64)):
+        profits, weights = generate_items(n_items, instance_class, seed=seed + k)
+        instances.append((list(zip(profits, weights)), sum(weights) // 2))
+
+    clients = [await SolveClient().connect(host, port, unix_path) for _ in range(connections)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = {}
+
+    async def one(k):
+        items, capacity = instances[k % len(instances)]
+        async with semaphore:
+            start = time.perf_counter()
+            result = await clients[k % connections].solve(items, capacity, algorithm, params, deadline)
+            latencies.append(time.perf_counter() - start)
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(k) for k in range(requests)))
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        await client.close()
+
+    p50, p90, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 90, 99])
+    return {
+        "requests": requests,
+        "statuses": statuses,
+        "elapsed": elapsed,
+        "throughput": requests / elapsed,
+        "latency_ms": {"mean": float(np.mean(latencies) * 1000), "p50": float(p50),
+                       "p90": float(p90), "p99": float(p99), "max": float(max(latencies) * 1000)},
+    }
+
+
+async def _bench(args):
+    server = None
+    host, port = args.host, args.port
+    if args.port is None and args.unix is None:
+        # No server given: start one in this process on a free port
+        server = await SolveServer(workers=args.workers).start(port=0)
+        host, port = server.address[:2]
+    try:
+        report = await run_load(args.requests, args.concurrency, args.connections, args.items,
+                                args.algorithm, args.instance_class, json.loads(args.params),
+                                args.deadline, args.seed, host, port, args.unix)
+    finally:
+        if server is not None:
+            await server.close()
+
+    latency = report["latency_ms"]
+    print(f"{report['requests']} requests in {report['elapsed']:.2f}s: {report['throughput']:.1f} req/s, statuses {report['statuses']}")
+    print(f"latency (ms): mean {latency['mean']:.2f}, p50 {latency['p50']:.2f}, p90 {latency['p90']:.2f}, "
+          f"p99 {latency['p99']:.2f}, max {latency['max']:.2f}")
+
+
+async def _serve(args):
+    server = await SolveServer(workers=args.workers, default_deadline=args.deadline).start(
+        args.host, args.port or DEFAULT_PORT, args.unix)
+    print(f"Serving on {server.address}", flush=True)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local knapsack solve service and load generator.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("serve", "bench"):
+        sub = subparsers.add_parser(name)
+        sub.add_argument("--host", default=DEFAULT_HOST)
+        sub.add_argument("--port", type=int, default=None, help=f"TCP port (serve default: {DEFAULT_PORT}).")
+        sub.add_argument("--unix", default=None, help="Unix socket path, instead of TCP.")
+        sub.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+        sub.add_argument("--deadline", type=float, default=DEFAULT_DEADLINE, help="Deadline of each job in seconds.")
+
+    bench = subparsers.choices["bench"]
+    bench.description = "Runs a load test. Without --port/--unix, starts a server in this process."
+    bench.add_argument("-n", "--requests", type=int, default=1000)
+    bench.add_argument("-c", "--concurrency", type=int, default=16)
+    bench.add_argument("--connections", type=int, default=4)
+    bench.add_argument("--items", type=int, default=100, help="Items per job.")
+    bench.add_argument("--algorithm", choices=ALGORITHMS, default="bnb")
+    bench.add_argument("--instance-class", type=int, default=1, help="Pisinger class of the generated jobs.")
+    bench.add_argument("--params", default="{}", help="Solver parameters as JSON.")
+    bench.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    asyncio.run(_serve(args) if args.command == "serve" else _bench(args))
+
+
+if __name__ == "__main__":
+    main()